@@ -4,22 +4,27 @@ Main interface for generating SAR narratives with full audit trail and explainab
 """
 
 import streamlit as st
-import json
+import hashlib
+import html
+import orjson
 import os
 from datetime import datetime
-from sar_generator import SARGenerator, calculate_time_savings
+from typing import Optional
+from sar_generator import SARGenerator, SAR_SECTION_TITLES, SENTENCE_SPLIT, calculate_time_savings
+import threading
 import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+@st.cache_resource
+def get_generator(api_key: Optional[str]):
+    """Return a shared SARGenerator per API key, kept alive across reruns"""
+    return SARGenerator(anthropic_api_key=api_key, batch_mode=True)
 
-# Page configuration
-st.set_page_config(
-    page_title="SAR Narrative Generator",
-    page_icon="🔍",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
 
 # Custom CSS for better styling
-st.markdown("""
+_CSS = """
     <style>
     .main-header {
         font-size: 2.5rem;
@@ -70,6 +75,11 @@ st.markdown("""
         margin-top: 1.5rem;
         margin-bottom: 0.5rem;
     }
+    .section-caption {
+        font-size: 0.875rem;
+        color: #666;
+        margin-bottom: 0;
+    }
     .clickable-sentence {
         cursor: pointer;
         padding: 0.2rem;
@@ -80,11 +90,347 @@ st.markdown("""
         background-color: #e8f4f8;
     }
     </style>
-""", unsafe_allow_html=True)
+"""
+
+
+# Seconds between UI refreshes while a SAR is being generated
+STREAM_UPDATE_INTERVAL = 0.5
+
+# Audit trail display settings
+AUDIT_PAGE_SIZE = 20
+
+# Generated SARs kept in memory for all sessions; least recently used are dropped
+SAR_STORE_SIZE = 32
+_CONF_COLOR = {"high": "#28a745", "medium": "#ffc107", "low": "#dc3545"}
+_CONF_CLASS = {"high": "confidence-high", "medium": "confidence-medium", "low": "confidence-low"}
+_CONF_EMOJI = {"high": "🟢", "medium": "🟡", "low": "🔴"}
+
+
+# Available cases
+CASE_OPTIONS = {
+    "Case 1: Rapid Fund Movement": {
+        "file": "sample_case_data.json",
+        "description": "₹50L from 47 accounts in 7 days → immediate foreign wire"
+    },
+    "Case 2: Trade-Based Money Laundering": {
+        "file": "case_trade_based_ml.json",
+        "description": "Over-invoicing electronics imports - ₹2.8 crores suspicious"
+    },
+    "Case 3: Structuring / Smurfing": {
+        "file": "case_structuring.json",
+        "description": "23 cash deposits below ₹50K threshold across 5 branches"
+    }
+}
+
+
+def load_case_data(filename):
+    """Load a single case file"""
+    with open(filename, 'rb') as f:
+        return orjson.loads(f.read())
+
+
+def case_file_mtimes() -> tuple:
+    """Modification times of the configured case files (raises if one is missing)"""
+    return tuple(os.path.getmtime(option["file"]) for option in CASE_OPTIONS.values())
+
+
+@st.cache_data(persist="disk")
+def load_all_cases(mtimes: tuple):
+    """
+    Load every configured case once, keyed by filename
+    mtimes (from case_file_mtimes) is only part of the cache key, so an
+    edited case file is reloaded; a missing file raises and is not cached
+    """
+    return {option["file"]: load_case_data(option["file"]) for option in CASE_OPTIONS.values()}
+
+
+@st.cache_resource
+def get_executor():
+    """Shared worker pool so SAR generation runs off the script thread"""
+    return ThreadPoolExecutor(max_workers=4)
+
+
+@st.cache_resource
+def _sar_store():
+    """Generated SARs keyed by content hash, kept out of session state, and the lock guarding them"""
+    return OrderedDict(), threading.Lock()
+
+
+def store_generated_sar(result: dict) -> str:
+    """Store a generated SAR and return its content-hash key"""
+    key = hashlib.blake2b(orjson.dumps(result), digest_size=16).hexdigest()
+    sars, lock = _sar_store()
+    with lock:
+        sars[key] = result
+        sars.move_to_end(key)
+        while len(sars) > SAR_STORE_SIZE:
+            sars.popitem(last=False)
+    return key
+
+
+def get_generated_sar(key: Optional[str]) -> Optional[dict]:
+    """Return a stored SAR, or None if there is none or it has been evicted"""
+    if key is None:
+        return None
+    sars, lock = _sar_store()
+    with lock:
+        result = sars.get(key)
+        if result is not None:
+            sars.move_to_end(key)
+    return result
+
+
+def clear_generated_sar():
+    """Forget this session's generated SAR and the state derived from it"""
+    st.session_state.sar_key = None
+    st.session_state.audit_index = {}
+    st.session_state.audit_prefix_index = {}
+    st.session_state.conf_counter = Counter()
+    st.session_state.selected_sentence = None
+    st.session_state.edit_mode = False
+
+
+def select_sentence(widget_key: str):
+    """Record the clicked statement and clear the selection in other sections"""
+    st.session_state.selected_sentence = st.session_state[widget_key]
+    for key in list(st.session_state.keys()):
+        if key.startswith("sent_") and key != widget_key:
+            st.session_state[key] = None
+
+
+# Fragments for the generated SAR view: interacting with one part of the page
+# reruns only that fragment instead of the whole script
+@st.fragment(run_every=STREAM_UPDATE_INTERVAL)
+def render_pending_generation():
+    """
+    Sections streamed so far by the background generation, refreshed on a
+    timer so the script thread is never blocked waiting for the result
+    """
+    pending = st.session_state.pending_generation
+    if pending is None or pending["future"].done():
+        # Rerun the whole app so the sidebar collects the finished result
+        st.rerun()
+    
+    st.markdown("### Generating SAR Narrative...")
+    
+    received = pending["received_chars"][0]
+    if received:
+        st.markdown(f"⏳ Receiving narrative from Claude... {received:,} characters")
+    
+    # Sections can finish out of order, so show them in FinCEN order
+    order = {title: i for i, title in enumerate(SAR_SECTION_TITLES)}
+    for section in sorted(pending["sections"], key=lambda s: order.get(s['title'], len(order))):
+        st.markdown(f"#### {section['title']}\n\n{section['content']}")
+
+
+@st.fragment
+def render_metrics(result: dict):
+    """Metric row (aggregates are computed once when the SAR is stored)"""
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("Generation Time", f"{st.session_state.generation_time:.1f}s")
+    
+    with col2:
+        time_savings = calculate_time_savings()
+        st.metric("Time Saved", time_savings['time_saved'])
+    
+    with col3:
+        conf_counter = st.session_state.conf_counter
+        avg_confidence = conf_counter['high'] / sum(conf_counter.values())
+        st.metric("Avg Confidence", f"{avg_confidence*100:.0f}%")
+    
+    with col4:
+        st.metric("Compliance", f"{st.session_state.compliance_pass}/{len(result['compliance_checklist'])}")
+
+
+@st.fragment
+def render_narrative_tab(result: dict):
+    """SAR narrative with per-statement audit lookup"""
+    st.markdown("### Generated SAR Narrative")
+    
+    if st.session_state.edit_mode:
+        st.info("✏️ **Edit Mode Active** - Modify the narrative sections below")
+    
+    edited = st.session_state.edited_content
+    
+    for i, section in enumerate(result['sections']):
+        section_title = section['title']
+        section_content = section['content']
+        section_confidence = section.get('confidence', 'medium')
+        
+        # Show section with confidence indicator
+        confidence_class = _CONF_CLASS.get(section_confidence, "confidence-medium")
+        
+        # Title and confidence badge in one element; both can come from Claude,
+        # so they are escaped before going into raw HTML
+        st.markdown(
+            f'<div class="{confidence_class}" style="margin-top: 1rem;">'
+            f'<h4>{html.escape(section_title)}</h4>'
+            f'<p class="section-caption">{_CONF_EMOJI.get(section_confidence, "🟡")} Confidence: {html.escape(section_confidence.upper())}</p>'
+            f'</div>',
+            unsafe_allow_html=True
+        )
+        
+        if st.session_state.edit_mode:
+            # Edit mode
+            edited_key = f"edit_{i}"
+            edited.setdefault(edited_key, section_content)
+            
+            new_content = st.text_area(
+                "Edit content:",
+                value=edited[edited_key],
+                height=200,
+                key=f"editor_{i}"
+            )
+            if new_content != edited[edited_key]:
+                edited[edited_key] = new_content
+            
+            if new_content != section_content:
+                st.warning("⚠️ This section has been modified")
+        else:
+            # View mode - one selectable widget per section instead of a button per sentence
+            sentences = SENTENCE_SPLIT.split(section_content)
+            sentence_texts = [sentence.strip() for sentence in sentences if sentence.strip()]
+            
+            st.radio(
+                "Statements",
+                sentence_texts,
+                index=None,
+                key=f"sent_{i}",
+                label_visibility="collapsed",
+                on_change=select_sentence,
+                args=(f"sent_{i}",),
+                help="Select a statement to see its data sources"
+            )
+    
+    # Show selected sentence audit trail
+    if st.session_state.selected_sentence and not st.session_state.edit_mode:
+        st.markdown("---")
+        st.markdown("### 🔍 Audit Trail for Selected Statement")
+        
+        # Find the sentence in audit trail (exact match, then 80-char prefix)
+        selected = st.session_state.selected_sentence
+        audit_item = (
+            st.session_state.audit_index.get(selected)
+            or st.session_state.audit_prefix_index.get(selected[:80])
+        )
+        
+        if audit_item:
+            st.markdown(f'<div class="audit-trail-box">', unsafe_allow_html=True)
+            st.markdown(f"**Statement:** {audit_item['sentence']}")
+            st.markdown(f"**Section:** {audit_item['section']}")
+            st.markdown(f"**Confidence:** {audit_item['confidence'].upper()}")
+            
+            st.markdown("**Data Sources:**")
+            for source in audit_item['data_sources']:
+                st.markdown(f"- {source}")
+            
+            st.markdown('</div>', unsafe_allow_html=True)
+
+
+@st.fragment
+def render_audit_trail_tab(result: dict):
+    """Complete audit trail, filtered and paginated"""
+    st.markdown("### Complete Audit Trail")
+    st.markdown("All statements with their data lineage and confidence levels")
+    
+    # Filter by confidence
+    confidence_filter = st.multiselect(
+        "Filter by Confidence Level",
+        ["high", "medium", "low"],
+        default=["high", "medium", "low"]
+    )
+    
+    filtered_trail = [
+        item for item in result['audit_trail']
+        if item['confidence'] in confidence_filter
+    ]
+    
+    st.markdown(f"**Showing {len(filtered_trail)} of {len(result['audit_trail'])} statements**")
+    
+    # Only render one page of expanders per rerun
+    page_count = max(1, -(-len(filtered_trail) // AUDIT_PAGE_SIZE))
+    if st.session_state.get("audit_page", 1) > page_count:
+        st.session_state.audit_page = page_count
+    page = st.number_input("Page", min_value=1, max_value=page_count, key="audit_page")
+    page_start = (page - 1) * AUDIT_PAGE_SIZE
+    
+    for i, item in enumerate(filtered_trail[page_start:page_start + AUDIT_PAGE_SIZE], page_start):
+        with st.expander(f"{i+1}. {item['sentence'][:80]}..."):
+            st.markdown(f"**Section:** {item['section']}")
+            
+            confidence_color = _CONF_COLOR.get(item['confidence'], "#6c757d")
+            
+            st.markdown(
+                f"**Confidence:** <span style='color: {confidence_color}; font-weight: bold;'>{item['confidence'].upper()}</span>",
+                unsafe_allow_html=True
+            )
+            
+            st.markdown("**Data Sources:**")
+            for source in item['data_sources']:
+                st.markdown(f"- `{source}`")
+
+
+@st.fragment
+def render_reasoning_tab(result: dict):
+    """Step-by-step reasoning trace"""
+    st.markdown("### AI Reasoning Process")
+    st.markdown("Step-by-step reasoning trace showing how the AI generated this narrative")
+    
+    if result.get('reasoning'):
+        for i, step in enumerate(result['reasoning'], 1):
+            st.markdown(f"**{i}.** {step}")
+    else:
+        st.info("Reasoning trace not available for template-generated narratives. Enable Claude API for full reasoning capture.")
+
+
+@st.fragment
+def render_compliance_tab(result: dict):
+    """FinCEN compliance checklist"""
+    st.markdown("### FinCEN SAR Compliance Checklist")
+    
+    checklist = result['compliance_checklist']
+    
+    st.table({
+        "Requirement": list(checklist.keys()),
+        "Status": ["✅ Pass" if status else "❌ Fail" for status in checklist.values()]
+    })
+    
+    st.markdown("---")
+    
+    passed = st.session_state.compliance_pass
+    total = len(checklist)
+    
+    st.progress(passed / total)
+    st.markdown(f"**Overall Compliance Score:** {passed}/{total} ({passed / total:.0%})")
+    
+    if passed == total:
+        st.success("✅ All compliance requirements met! This SAR is ready for regulatory filing.")
+    elif passed * 5 >= total * 4:
+        st.warning("⚠️ Most requirements met. Review flagged items before filing.")
+    else:
+        st.error("❌ Significant compliance gaps. This SAR requires additional work before filing.")
+
+
+# Page configuration
+st.set_page_config(
+    page_title="SAR Narrative Generator",
+    page_icon="🔍",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+# Custom CSS for better styling. Streamlit drops any element not emitted on a
+# rerun, so this has to be sent every run; keeping it a module constant avoids
+# rebuilding the string.
+st.markdown(_CSS, unsafe_allow_html=True)
 
 # Initialize session state
-if 'generated_sar' not in st.session_state:
-    st.session_state.generated_sar = None
+if 'pending_generation' not in st.session_state:
+    st.session_state.pending_generation = None
+if 'sar_key' not in st.session_state:
+    st.session_state.sar_key = None
 if 'selected_sentence' not in st.session_state:
     st.session_state.selected_sentence = None
 if 'edit_mode' not in st.session_state:
@@ -93,6 +439,10 @@ if 'edited_content' not in st.session_state:
     st.session_state.edited_content = {}
 if 'generation_time' not in st.session_state:
     st.session_state.generation_time = None
+if 'audit_index' not in st.session_state:
+    st.session_state.audit_index = {}
+if 'audit_prefix_index' not in st.session_state:
+    st.session_state.audit_prefix_index = {}
 
 # Sidebar
 with st.sidebar:
@@ -111,44 +461,20 @@ with st.sidebar:
     
     st.markdown("### 📁 Case Selection")
     
-    # Define available cases
-    case_options = {
-        "Case 1: Rapid Fund Movement": {
-            "file": "sample_case_data.json",
-            "description": "₹50L from 47 accounts in 7 days → immediate foreign wire"
-        },
-        "Case 2: Trade-Based Money Laundering": {
-            "file": "case_trade_based_ml.json",
-            "description": "Over-invoicing electronics imports - ₹2.8 crores suspicious"
-        },
-        "Case 3: Structuring / Smurfing": {
-            "file": "case_structuring.json",
-            "description": "23 cash deposits below ₹50K threshold across 5 branches"
-        }
-    }
-    
     # Load sample case
     selected_case = st.selectbox(
         "Select Case",
-        list(case_options.keys()),
+        list(CASE_OPTIONS.keys()),
         help="Select a case to generate SAR narrative"
     )
     
     # Show case description
-    st.caption(case_options[selected_case]["description"])
+    st.caption(CASE_OPTIONS[selected_case]["description"])
     
     # Load case data
-    @st.cache_data
-    def load_case_data(filename):
-        try:
-            with open(filename, 'r') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            st.error(f"Case file not found: {filename}")
-            st.stop()
-    
+    case_file = CASE_OPTIONS[selected_case]["file"]
     try:
-        case_data = load_case_data(case_options[selected_case]["file"])
+        case_data = load_all_cases(case_file_mtimes())[case_file]
         
         st.markdown(f"""
         **Case ID:** {case_data['case_id']}  
@@ -158,6 +484,9 @@ with st.sidebar:
         **Priority:** {case_data['alert_details']['alert_priority']}
         """)
         
+    except FileNotFoundError as e:
+        st.error(f"Case file not found: {e.filename}")
+        st.stop()
     except Exception as e:
         st.error(f"Error loading case data: {str(e)}")
         st.stop()
@@ -165,29 +494,65 @@ with st.sidebar:
     st.markdown("---")
     
     # Generate button
-    if st.button("🚀 Generate SAR Narrative", type="primary", use_container_width=True):
-        with st.spinner("Generating SAR narrative with audit trail..."):
-            start_time = time.time()
-            
-            # Initialize generator
-            generator = SARGenerator(anthropic_api_key=api_key if api_key else None)
-            
-            # Generate SAR
-            result = generator.generate_sar_narrative(case_data)
+    if st.button(
+        "🚀 Generate SAR Narrative",
+        type="primary",
+        use_container_width=True,
+        disabled=st.session_state.pending_generation is not None
+    ):
+        # Reuse the cached generator for this API key
+        generator = get_generator(api_key or None)
+        
+        # Generate SAR in the background; sections stream into the pending
+        # entry and the full result is collected on a later rerun
+        streamed_sections = []
+        # Only the running character count of streamed text is kept
+        received_chars = [0]
+        
+        def count_text(chunk: str):
+            received_chars[0] += len(chunk)
+        
+        future = get_executor().submit(
+            generator.generate_sar_narrative, case_data,
+            streamed_sections.append, count_text
+        )
+        st.session_state.pending_generation = {
+            "future": future,
+            "start_time": time.time(),
+            "sections": streamed_sections,
+            "received_chars": received_chars,
+        }
+    
+    pending = st.session_state.pending_generation
+    if pending is not None:
+        if pending["future"].done():
+            st.session_state.pending_generation = None
+            result = pending["future"].result()
             
-            end_time = time.time()
-            generation_time = end_time - start_time
+            generation_time = time.time() - pending["start_time"]
             
             # Store in session state
-            st.session_state.generated_sar = result
+            st.session_state.sar_key = store_generated_sar(result)
+            st.session_state.audit_index = {item['sentence']: item for item in result['audit_trail']}
+            st.session_state.audit_prefix_index = {item['sentence'][:80]: item for item in result['audit_trail']}
+            st.session_state.conf_counter = Counter(s.get('confidence', 'medium') for s in result['sections'])
+            st.session_state.compliance_pass = sum(result['compliance_checklist'].values())
             st.session_state.generation_time = generation_time
             st.session_state.edit_mode = False
             st.session_state.edited_content = {}
             
             st.success(f"✅ SAR Generated in {generation_time:.1f} seconds!")
+        else:
+            st.info("⏳ Generating SAR narrative with audit trail...")
+    
+    # Other sessions' generations can evict this session's SAR from the
+    # shared store; drop the state derived from it so the UI matches
+    result = get_generated_sar(st.session_state.sar_key)
+    if result is None and st.session_state.sar_key is not None:
+        clear_generated_sar()
     
     # Action buttons
-    if st.session_state.generated_sar:
+    if result is not None:
         st.markdown("---")
         st.markdown("### 📝 Actions")
         
@@ -201,16 +566,18 @@ with st.sidebar:
                 st.info("PDF export functionality would download the SAR as a formatted PDF document.")
         
         if st.button("🔄 Reset", use_container_width=True):
-            st.session_state.generated_sar = None
-            st.session_state.selected_sentence = None
-            st.session_state.edit_mode = False
+            clear_generated_sar()
             st.rerun()
 
 # Main content area
 st.markdown('<p class="main-header">SAR Narrative Generator with Audit Trail</p>', unsafe_allow_html=True)
 st.markdown('<p class="sub-header">Transforming Compliance Through Explainable AI</p>', unsafe_allow_html=True)
 
-if st.session_state.generated_sar is None:
+if st.session_state.pending_generation is not None:
+    # Sections appear as the background generation produces them
+    render_pending_generation()
+
+elif result is None:
     # Welcome screen
     st.markdown("## 👋 Welcome to the SAR Narrative Generator")
     
@@ -280,27 +647,8 @@ if st.session_state.generated_sar is None:
     st.info("👈 Click **Generate SAR Narrative** in the sidebar to get started!")
 
 else:
-    # Generated SAR display
-    result = st.session_state.generated_sar
-    
-    # Metrics at top
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.metric("Generation Time", f"{st.session_state.generation_time:.1f}s")
-    
-    with col2:
-        time_savings = calculate_time_savings()
-        st.metric("Time Saved", time_savings['time_saved'])
-    
-    with col3:
-        avg_confidence = sum(1 for s in result['sections'] if s.get('confidence') == 'high') / len(result['sections'])
-        st.metric("Avg Confidence", f"{avg_confidence*100:.0f}%")
-    
-    with col4:
-        compliant = sum(1 for v in result['compliance_checklist'].values() if v)
-        total = len(result['compliance_checklist'])
-        st.metric("Compliance", f"{compliant}/{total}")
+    # Generated SAR display, metrics at top
+    render_metrics(result)
     
     st.markdown("---")
     
@@ -313,166 +661,16 @@ else:
     ])
     
     with tab1:
-        st.markdown("### Generated SAR Narrative")
-        
-        if st.session_state.edit_mode:
-            st.info("✏️ **Edit Mode Active** - Modify the narrative sections below")
-        
-        for i, section in enumerate(result['sections']):
-            section_title = section['title']
-            section_content = section['content']
-            section_confidence = section.get('confidence', 'medium')
-            
-            # Show section with confidence indicator
-            confidence_class = f"confidence-{section_confidence}"
-            
-            st.markdown(f'<div class="{confidence_class}">', unsafe_allow_html=True)
-            st.markdown(f"#### {section_title}")
-            
-            # Confidence badge
-            confidence_emoji = {"high": "🟢", "medium": "🟡", "low": "🔴"}
-            st.caption(f"{confidence_emoji.get(section_confidence, '🟡')} Confidence: {section_confidence.upper()}")
-            
-            if st.session_state.edit_mode:
-                # Edit mode
-                edited_key = f"edit_{i}"
-                if edited_key not in st.session_state.edited_content:
-                    st.session_state.edited_content[edited_key] = section_content
-                
-                new_content = st.text_area(
-                    "Edit content:",
-                    value=st.session_state.edited_content[edited_key],
-                    height=200,
-                    key=f"editor_{i}"
-                )
-                st.session_state.edited_content[edited_key] = new_content
-                
-                if new_content != section_content:
-                    st.warning("⚠️ This section has been modified")
-            else:
-                # View mode - make sentences clickable
-                sentences = section_content.split('. ')
-                for j, sentence in enumerate(sentences):
-                    if sentence.strip():
-                        sentence_text = sentence + ('.' if not sentence.endswith('.') else '')
-                        
-                        # Make sentence clickable
-                        if st.button(
-                            sentence_text,
-                            key=f"sent_{i}_{j}",
-                            help="Click to see data sources for this statement"
-                        ):
-                            st.session_state.selected_sentence = sentence_text
-                        
-                        st.markdown("")  # Spacing
-            
-            st.markdown('</div>', unsafe_allow_html=True)
-            st.markdown("")  # Spacing between sections
-        
-        # Show selected sentence audit trail
-        if st.session_state.selected_sentence and not st.session_state.edit_mode:
-            st.markdown("---")
-            st.markdown("### 🔍 Audit Trail for Selected Statement")
-            
-            # Find the sentence in audit trail
-            matching_audit = [
-                item for item in result['audit_trail'] 
-                if item['sentence'] in st.session_state.selected_sentence 
-                or st.session_state.selected_sentence in item['sentence']
-            ]
-            
-            if matching_audit:
-                audit_item = matching_audit[0]
-                
-                st.markdown(f'<div class="audit-trail-box">', unsafe_allow_html=True)
-                st.markdown(f"**Statement:** {audit_item['sentence']}")
-                st.markdown(f"**Section:** {audit_item['section']}")
-                st.markdown(f"**Confidence:** {audit_item['confidence'].upper()}")
-                
-                st.markdown("**Data Sources:**")
-                for source in audit_item['data_sources']:
-                    st.markdown(f"- {source}")
-                
-                st.markdown('</div>', unsafe_allow_html=True)
+        render_narrative_tab(result)
     
     with tab2:
-        st.markdown("### Complete Audit Trail")
-        st.markdown("All statements with their data lineage and confidence levels")
-        
-        # Filter by confidence
-        confidence_filter = st.multiselect(
-            "Filter by Confidence Level",
-            ["high", "medium", "low"],
-            default=["high", "medium", "low"]
-        )
-        
-        filtered_trail = [
-            item for item in result['audit_trail']
-            if item['confidence'] in confidence_filter
-        ]
-        
-        st.markdown(f"**Showing {len(filtered_trail)} of {len(result['audit_trail'])} statements**")
-        
-        for i, item in enumerate(filtered_trail):
-            with st.expander(f"{i+1}. {item['sentence'][:80]}..."):
-                st.markdown(f"**Section:** {item['section']}")
-                
-                confidence_color = {
-                    "high": "#28a745",
-                    "medium": "#ffc107", 
-                    "low": "#dc3545"
-                }.get(item['confidence'], "#6c757d")
-                
-                st.markdown(
-                    f"**Confidence:** <span style='color: {confidence_color}; font-weight: bold;'>{item['confidence'].upper()}</span>",
-                    unsafe_allow_html=True
-                )
-                
-                st.markdown("**Data Sources:**")
-                for source in item['data_sources']:
-                    st.markdown(f"- `{source}`")
+        render_audit_trail_tab(result)
     
     with tab3:
-        st.markdown("### AI Reasoning Process")
-        st.markdown("Step-by-step reasoning trace showing how the AI generated this narrative")
-        
-        if result.get('reasoning'):
-            for i, step in enumerate(result['reasoning'], 1):
-                st.markdown(f"**{i}.** {step}")
-        else:
-            st.info("Reasoning trace not available for template-generated narratives. Enable Claude API for full reasoning capture.")
+        render_reasoning_tab(result)
     
     with tab4:
-        st.markdown("### FinCEN SAR Compliance Checklist")
-        
-        checklist = result['compliance_checklist']
-        
-        col1, col2 = st.columns([3, 1])
-        
-        for requirement, status in checklist.items():
-            with col1:
-                st.markdown(f"**{requirement}**")
-            with col2:
-                if status:
-                    st.markdown("✅ **Pass**")
-                else:
-                    st.markdown("❌ **Fail**")
-        
-        st.markdown("---")
-        
-        passed = sum(1 for v in checklist.values() if v)
-        total = len(checklist)
-        percentage = (passed / total) * 100
-        
-        st.progress(passed / total)
-        st.markdown(f"**Overall Compliance Score:** {passed}/{total} ({percentage:.0f}%)")
-        
-        if percentage == 100:
-            st.success("✅ All compliance requirements met! This SAR is ready for regulatory filing.")
-        elif percentage >= 80:
-            st.warning("⚠️ Most requirements met. Review flagged items before filing.")
-        else:
-            st.error("❌ Significant compliance gaps. This SAR requires additional work before filing.")
+        render_compliance_tab(result)
 
 # Footer
 st.markdown("---")
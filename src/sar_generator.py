@@ -3,25 +3,302 @@ SAR Generation Helper Functions
 Handles narrative generation, audit trail creation, and confidence scoring
 """
 
+import asyncio
+import functools
+import hashlib
+import io
 import json
+import logging
 import re
-from typing import Dict, List, Tuple, Any
+import time
+from typing import Dict, List, Tuple, Any, Callable, Optional, Sequence
 from datetime import datetime
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+# Narrative section titles, in FinCEN order
+SECTION_SUBJECT = "SUBJECT INFORMATION"
+SECTION_ACTIVITY = "SUSPICIOUS ACTIVITY DESCRIPTION"
+SECTION_PATTERN = "PATTERN ANALYSIS AND MONEY LAUNDERING INDICATORS"
+SECTION_FINDINGS = "INVESTIGATIVE FINDINGS"
+SECTION_CONCLUSION = "CONCLUSION AND BASIS FOR SUSPICION"
+
+SAR_SECTION_TITLES = (
+    SECTION_SUBJECT,
+    SECTION_ACTIVITY,
+    SECTION_PATTERN,
+    SECTION_FINDINGS,
+    SECTION_CONCLUSION,
+)
+
+# Seconds without a streamed chunk before a Claude response is treated as dead
+STREAM_IDLE_TIMEOUT = 30.0
+
+# Claude model and sampling temperature for narrative generation
+CLAUDE_MODEL = "claude-sonnet-4-20250514"
+CLAUDE_TEMPERATURE = 0.3
+
+# Claude responses are reused for identical cases for this many seconds. Bump
+# PROMPT_VERSION whenever the prompt changes so stale responses are not served.
+RESPONSE_CACHE_TTL = 1800
+PROMPT_VERSION = "5"
+
+# Case-independent system prompt. Kept byte-identical across calls so Claude
+# can serve it from the prompt cache.
+STATIC_INSTRUCTIONS = """You are a financial crime compliance analyst writing a Suspicious Activity Report (SAR) narrative.
+
+The user message contains the case details for one SAR.
+
+INSTRUCTIONS:
+Write a professional SAR narrative following FinCEN format with these sections:
+
+1. SUBJECT INFORMATION
+2. SUSPICIOUS ACTIVITY DESCRIPTION  
+3. PATTERN ANALYSIS AND MONEY LAUNDERING INDICATORS
+4. INVESTIGATIVE FINDINGS
+5. CONCLUSION AND BASIS FOR SUSPICION
+
+Requirements:
+- Be factual and objective
+- Cite specific data points (dates, amounts, account numbers)
+- Explain why the activity is suspicious
+- Reference money laundering typologies
+- Avoid bias or discriminatory language
+- Write in clear, professional language suitable for regulatory review
+
+Return the narrative by calling the emit_sar tool, with one entry in sections per section above and your step-by-step reasoning.
+"""
+
+# Sentence boundaries for the audit trail; the app splits displayed text
+# with the same pattern so statements match audit trail entries exactly
+SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+')
+
+# Keywords indicating factual statements (high confidence)
+_FACTUAL_KEYWORDS = ("account number", "date", "amount", "transaction", "received", "transferred")
+
+# Keywords indicating analysis/interpretation (medium confidence)
+_ANALYTICAL_KEYWORDS = ("suggests", "indicates", "appears", "consistent with", "raises concerns")
+
+# Classifies confidence keywords in one case-insensitive pass over a sentence
+_CONF_RE = re.compile(
+    "(?P<analytic>" + "|".join(map(re.escape, _ANALYTICAL_KEYWORDS)) + ")"
+    "|(?P<factual>" + "|".join(map(re.escape, _FACTUAL_KEYWORDS)) + ")",
+    re.IGNORECASE
+)
+
+def _normalize_case_value(value: Any) -> Any:
+    """Recursively copy case data with string keys and fixed-precision floats"""
+    if isinstance(value, dict):
+        return {str(key): _normalize_case_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize_case_value(item) for item in value]
+    if isinstance(value, float):
+        return f"{value:.6f}"
+    return value
+
+
+def _canonical_case_bytes(case_data: Dict) -> bytes:
+    """
+    Serialize case data byte-for-byte deterministically as UTF-8 JSON
+    Keys are sorted, floats have fixed precision, and red flags and outgoing
+    transactions are put in a stable order, so the same case always yields
+    the same prompt text and cache key
+    """
+    normalized = _normalize_case_value(case_data)
+    
+    context = normalized.get("additional_context")
+    if isinstance(context, dict) and isinstance(context.get("red_flags"), list):
+        context["red_flags"] = sorted(context["red_flags"], key=str)
+    
+    outgoing = normalized.get("outgoing_transactions")
+    if isinstance(outgoing, dict) and isinstance(outgoing.get("transactions"), list):
+        outgoing["transactions"] = sorted(
+            outgoing["transactions"],
+            key=lambda txn: (str(txn.get("date", "")), str(txn.get("transaction_time", "")))
+        )
+    
+    if orjson is not None:
+        return orjson.dumps(normalized, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS, default=str)
+    return json.dumps(
+        normalized, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str
+    ).encode()
+
+
+# Trailing location segment of a "Bank, City, Country" string
+_COUNTRY_RE = re.compile(r',\s*([^,]+?)\s*$')
+
+# System prompt for per-section generation (batch_mode=False). Shared by all
+# section requests so the case facts that follow it form a common cached prefix.
+SECTION_INSTRUCTIONS = """You are a financial crime compliance analyst writing one section of a Suspicious Activity Report (SAR) narrative following FinCEN format.
+
+The case details follow. The user message names the section to write.
+
+Requirements:
+- Be factual and objective
+- Cite specific data points (dates, amounts, account numbers)
+- Explain why the activity is suspicious
+- Reference money laundering typologies
+- Avoid bias or discriminatory language
+- Write in clear, professional language suitable for regulatory review
+- Do not repeat the section title in the content
+
+Return the section by calling the emit_section tool.
+"""
+
+# What each section covers, for per-section generation
+SECTION_GUIDANCE = {
+    SECTION_SUBJECT: "Identify the subject: name, date of birth, account, occupation, address, KYC status and risk rating.",
+    SECTION_ACTIVITY: "Describe the suspicious transactions: period, counts, amounts, counterparties and how they deviate from normal behaviour.",
+    SECTION_PATTERN: "Map the activity to money laundering typologies and list the red flags present.",
+    SECTION_FINDINGS: "Document the internal and external verification performed and its outcomes.",
+    SECTION_CONCLUSION: "Summarize the basis for suspicion and cite the SAR filing and confidentiality regulations.",
+}
+
+
+# Structured output: Claude is forced to call these tools, so the response is
+# the tool input itself rather than JSON scraped from free text
+_SECTION_PROPERTIES = {
+    "content": {"type": "string", "description": "Section content"},
+    "data_sources": {
+        "type": "array",
+        "items": {"type": "string"},
+        "description": "Data points used"
+    },
+    "confidence": {"type": "string", "enum": ["high", "medium", "low"]}
+}
+
+_REASONING_PROPERTY = {
+    "type": "array",
+    "items": {"type": "string"},
+    "description": "Step-by-step reasoning trace"
+}
+
+EMIT_SAR_TOOL = {
+    "name": "emit_sar",
+    "description": "Return the completed SAR narrative",
+    "input_schema": {
+        "type": "object",
+        # sections come first so they stream before the full narrative text
+        "properties": {
+            "sections": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {"title": {"type": "string", "enum": list(SAR_SECTION_TITLES)}, **_SECTION_PROPERTIES},
+                    "required": ["title", "content", "data_sources", "confidence"]
+                }
+            },
+            "narrative": {"type": "string", "description": "Full narrative text"},
+            "reasoning": _REASONING_PROPERTY
+        },
+        "required": ["narrative", "sections"]
+    }
+}
+
+EMIT_SECTION_TOOL = {
+    "name": "emit_section",
+    "description": "Return one completed SAR narrative section",
+    "input_schema": {
+        "type": "object",
+        "properties": {**_SECTION_PROPERTIES, "reasoning": _REASONING_PROPERTY},
+        "required": ["content", "data_sources", "confidence"]
+    }
+}
+
+
+def _assemble_narrative(sections: List[Dict]) -> str:
+    """Write section titles and contents into one narrative string in a single buffer"""
+    buf = io.StringIO()
+    write = buf.write
+    for index, section in enumerate(sections):
+        if index:
+            write("\n\n")
+        write(section["title"])
+        write("\n\n")
+        write(section["content"])
+    return buf.getvalue()
+
+
+def _tool_input(message: Any, tool_name: str) -> Optional[Dict]:
+    """
+    Return the input of the named tool call in a Claude message, or None
+    A response cut off at max_tokens is treated as no result: the SDK still
+    parses the truncated tool input, but it is missing fields
+    """
+    if message.stop_reason == "max_tokens":
+        return None
+    for block in message.content:
+        if block.type == "tool_use" and block.name == tool_name:
+            return block.input
+    return None
+
+
+def _is_complete_section(section: Any) -> bool:
+    """True if a section has the title and content the narrative is built from"""
+    return (
+        isinstance(section, dict)
+        and isinstance(section.get("title"), str)
+        and isinstance(section.get("content"), str)
+    )
+
+
+def _is_complete_narrative(narrative_data: Any) -> bool:
+    """True if emit_sar input has a narrative and at least one complete section"""
+    if not isinstance(narrative_data, dict) or not isinstance(narrative_data.get("narrative"), str):
+        return False
+    sections = narrative_data.get("sections")
+    return isinstance(sections, list) and bool(sections) and all(map(_is_complete_section, sections))
+
+
+# System prompt blocks built once at import, so each call only adds the
+# per-case facts
+_BATCH_SYSTEM_PROMPT = [{
+    "type": "text",
+    "text": STATIC_INSTRUCTIONS,
+    "cache_control": {"type": "ephemeral"}
+}]
+_SECTION_SYSTEM_BLOCK = {"type": "text", "text": SECTION_INSTRUCTIONS}
+
 
 class SARGenerator:
     """Generates SAR narratives with full audit trail and confidence scoring"""
     
-    def __init__(self, anthropic_api_key: str = None):
-        """Initialize the SAR generator"""
+    def __init__(self, anthropic_api_key: str = None, batch_mode: bool = True):
+        """
+        Initialize the SAR generator
+        
+        Args:
+            anthropic_api_key: Claude API key; template generation is used without it
+            batch_mode: Request all narrative sections in a single Claude call
+                instead of one concurrent call per section
+        """
         self.api_key = anthropic_api_key
+        self.batch_mode = batch_mode
         self.audit_trail = []
         self.confidence_scores = {}
-        
-    def generate_sar_narrative(self, case_data: Dict) -> Dict[str, Any]:
+        self._response_cache: Dict[str, Tuple[float, Dict]] = {}
+        self._source_index = None
+        self._sources_cache: Dict[Tuple[int, str], Tuple[str, ...]] = {}
+        self._sources_cache_case_id = None
+        self._client = None
+        
+    def generate_sar_narrative(self, case_data: Dict,
+                               on_section: Optional[Callable[[Dict], None]] = None,
+                               on_text: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
         """
         Generate a complete SAR narrative with audit trail
         
+        Args:
+            case_data: Structured case data
+            on_section: Called with each narrative section as soon as it is available
+            on_text: Called with each chunk of text streamed from Claude
+        
         Returns:
             Dict containing:
                 - narrative: The complete SAR text
@@ -31,14 +308,62 @@ class SARGenerator:
                 - reasoning: LLM reasoning trace
         """
         
-        # Build the prompt for Claude
-        prompt = self._build_generation_prompt(case_data)
+        # Serialize the case once; the prompt, response cache key and audit
+        # trail cache all derive from the same canonical bytes
+        canonical = _canonical_case_bytes(case_data)
         
         # Generate the narrative (this will use Claude API)
-        narrative_data = self._generate_with_claude(prompt, case_data)
+        narrative_data = self._generate_narrative_data(case_data, canonical, on_text, on_section)
         
         # Build audit trail
-        audit_trail = self._build_audit_trail(narrative_data, case_data)
+        audit_trail = self._build_audit_trail(narrative_data, case_data, hash(canonical))
+        
+        return self._assemble_result(case_data, narrative_data, audit_trail)
+    
+    async def generate_sar_narrative_async(self, case_data: Dict,
+                                           on_section: Optional[Callable[[Dict], None]] = None,
+                                           on_text: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """
+        Async variant of generate_sar_narrative
+        Generation (prompt build, API call and section callbacks) and the audit
+        trail build run in worker threads so the calling event loop is never blocked
+        """
+        
+        canonical = _canonical_case_bytes(case_data)
+        
+        narrative_data = await asyncio.to_thread(self._generate_narrative_data, case_data, canonical, on_text, on_section)
+        
+        audit_trail = await asyncio.to_thread(self._build_audit_trail, narrative_data, case_data, hash(canonical))
+        
+        return self._assemble_result(case_data, narrative_data, audit_trail)
+    
+    def _generate_narrative_data(self, case_data: Dict, canonical: bytes,
+                                 on_text: Optional[Callable[[str], None]] = None,
+                                 on_section: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """
+        Build the prompt and generate the narrative, passing each section to
+        on_section once: as Claude finishes it, or at the end for cache hits
+        and template fallbacks. Shared by the sync and async entry points
+        """
+        
+        prompt = self._build_generation_prompt(case_data, canonical)
+        
+        streamed = set()
+        
+        def emit_section(section: Dict) -> None:
+            if on_section and section["title"] not in streamed:
+                streamed.add(section["title"])
+                on_section(section)
+        
+        narrative_data = self._generate_with_claude(prompt, case_data, canonical, on_text, emit_section)
+        
+        for section in narrative_data["sections"]:
+            emit_section(section)
+        
+        return narrative_data
+    
+    def _assemble_result(self, case_data: Dict, narrative_data: Dict, audit_trail: List[Dict]) -> Dict[str, Any]:
+        """Combine generated narrative and audit trail into the final SAR result"""
         
         # Calculate confidence scores
         confidence_scores = self._calculate_confidence_scores(case_data, narrative_data)
@@ -52,8 +377,11 @@ class SARGenerator:
             "compliance_checklist": self._generate_compliance_checklist(narrative_data)
         }
     
-    def _build_generation_prompt(self, case_data: Dict) -> str:
-        """Build the prompt for Claude API"""
+    def _build_generation_prompt(self, case_data: Dict, canonical: bytes) -> str:
+        """
+        Build the per-case part of the prompt (the static part is STATIC_INSTRUCTIONS)
+        canonical is the case's _canonical_case_bytes
+        """
         
         customer = case_data["customer"]
         alert = case_data["alert_details"]
@@ -61,9 +389,10 @@ class SARGenerator:
         outgoing = case_data["outgoing_transactions"]
         context = case_data["additional_context"]
         
-        prompt = f"""You are a financial crime compliance analyst writing a Suspicious Activity Report (SAR) narrative.
-
-CASE DETAILS:
+        red_flags = context['red_flags']
+        red_flags_block = '- ' + '\n- '.join(red_flags) if red_flags else ''
+        
+        prompt = f"""CASE DETAILS:
 - Customer: {customer['name']} (ID: {customer['customer_id']})
 - Account: {customer['account_number']} ({customer['account_type']})
 - Alert Type: {alert['alert_type']} - {alert['alert_subtype']}
@@ -74,77 +403,202 @@ SUSPICIOUS ACTIVITY SUMMARY:
 The customer received {incoming['total_count']} transactions totaling {incoming['total_amount']} from {incoming['unique_counterparties']} different accounts over {case_data['suspicious_activity_period']['total_days']} days. Subsequently, the customer transferred {outgoing['total_amount']} to an international beneficiary within hours.
 
 KEY RED FLAGS:
-{chr(10).join(f"- {flag}" for flag in context['red_flags'])}
-
-INSTRUCTIONS:
-Write a professional SAR narrative following FinCEN format with these sections:
+{red_flags_block}
 
-1. SUBJECT INFORMATION
-2. SUSPICIOUS ACTIVITY DESCRIPTION  
-3. PATTERN ANALYSIS AND MONEY LAUNDERING INDICATORS
-4. INVESTIGATIVE FINDINGS
-5. CONCLUSION AND BASIS FOR SUSPICION
-
-Requirements:
-- Be factual and objective
-- Cite specific data points (dates, amounts, account numbers)
-- Explain why the activity is suspicious
-- Reference money laundering typologies
-- Avoid bias or discriminatory language
-- Write in clear, professional language suitable for regulatory review
-
-Return your response in this JSON format:
-{{
-  "narrative": "Full narrative text",
-  "sections": [
-    {{
-      "title": "Section title",
-      "content": "Section content",
-      "data_sources": ["list of data points used"],
-      "confidence": "high|medium|low"
-    }}
-  ],
-  "reasoning": ["step 1: considered X", "step 2: analyzed Y", ...]
-}}
+CASE DATA (JSON):
+{canonical.decode()}
 """
         return prompt
     
-    def _generate_with_claude(self, prompt: str, case_data: Dict) -> Dict:
+    def _generate_with_claude(self, prompt: str, case_data: Dict, canonical: bytes,
+                              on_text: Optional[Callable[[str], None]] = None,
+                              on_section: Optional[Callable[[Dict], None]] = None) -> Dict:
         """
-        Generate SAR using Claude API
+        Generate SAR using Claude API, streaming the response
+        In batch mode every section is requested in one call (one round trip);
+        otherwise the sections are requested concurrently, one call each.
         For demo purposes, this includes a fallback template-based generation
         """
         
         # Try to use Claude API if available
         if self.api_key:
+            cache_key = self._response_cache_key(canonical)
+            cached = self._response_cache.get(cache_key)
+            if cached and time.time() - cached[0] < RESPONSE_CACHE_TTL:
+                return cached[1]
+            
             try:
-                import anthropic
-                client = anthropic.Anthropic(api_key=self.api_key)
-                
-                message = client.messages.create(
-                    model="claude-sonnet-4-20250514",
-                    max_tokens=4000,
-                    temperature=0.3,
-                    messages=[{
-                        "role": "user",
-                        "content": prompt
-                    }]
-                )
+                if self.batch_mode:
+                    narrative_data = self._generate_batched(prompt, on_text, on_section)
+                else:
+                    narrative_data = asyncio.run(self._generate_sections_parallel(prompt, on_text, on_section))
                 
-                # Parse the JSON response
-                response_text = message.content[0].text
-                # Extract JSON from response
-                json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-                if json_match:
-                    return json.loads(json_match.group())
+                if narrative_data:
+                    self._store_response(cache_key, narrative_data)
+                    return narrative_data
                 
-            except Exception as e:
-                print(f"Claude API error: {e}")
+            except Exception:
+                logger.warning("Claude API error, using template narrative", exc_info=True)
                 # Fall through to template-based generation
         
         # Fallback: Template-based generation for demo
         return self._generate_template_narrative(case_data)
     
+    def _generate_batched(self, prompt: str,
+                          on_text: Optional[Callable[[str], None]] = None,
+                          on_section: Optional[Callable[[Dict], None]] = None) -> Optional[Dict]:
+        """Request the whole narrative in one streamed call; None if Claude returned no complete narrative"""
+        
+        # The sync client is created once per generator so its HTTP
+        # connections are reused across calls
+        if self._client is None:
+            import anthropic
+            self._client = anthropic.Anthropic(api_key=self.api_key)
+        client = self._client
+        
+        # The idle timeout bounds the gap between streamed chunks, so a
+        # dead connection fails fast instead of blocking the whole call
+        with client.messages.stream(
+            model=CLAUDE_MODEL,
+            max_tokens=4000,
+            temperature=CLAUDE_TEMPERATURE,
+            system=_BATCH_SYSTEM_PROMPT,
+            tools=[EMIT_SAR_TOOL],
+            tool_choice={"type": "tool", "name": EMIT_SAR_TOOL["name"]},
+            # The case block carries the canonical case JSON, so it is cached
+            # too: the static prompt alone is below the cacheable minimum
+            messages=[{
+                "role": "user",
+                "content": [{
+                    "type": "text",
+                    "text": prompt,
+                    "cache_control": {"type": "ephemeral"}
+                }]
+            }],
+            timeout=STREAM_IDLE_TIMEOUT
+        ) as stream:
+            finished = 0
+            for event in stream:
+                if event.type != "input_json":
+                    continue
+                if on_text:
+                    on_text(event.partial_json)
+                if on_section and isinstance(event.snapshot, dict):
+                    # A streamed section is complete once the next one has started
+                    sections = event.snapshot.get("sections")
+                    if isinstance(sections, list):
+                        while finished < len(sections) - 1:
+                            if _is_complete_section(sections[finished]):
+                                on_section(sections[finished])
+                            finished += 1
+            message = stream.get_final_message()
+        logger.debug("Claude prompt cache: %d tokens read from cache", message.usage.cache_read_input_tokens or 0)
+        
+        narrative_data = _tool_input(message, EMIT_SAR_TOOL["name"])
+        return narrative_data if _is_complete_narrative(narrative_data) else None
+    
+    async def _generate_sections_parallel(self, prompt: str,
+                                          on_text: Optional[Callable[[str], None]] = None,
+                                          on_section: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """
+        Request each narrative section concurrently and assemble them in order
+        Sections are passed to on_section as they finish, in completion order.
+        Raises if any section fails so the caller can fall back to templates
+        
+        Only used with batch_mode=False; the Streamlit app always uses batch mode
+        """
+        
+        import anthropic
+        client = anthropic.AsyncAnthropic(api_key=self.api_key)
+        
+        # Shared prefix: section instructions followed by the case facts
+        system = [
+            _SECTION_SYSTEM_BLOCK,
+            {"type": "text", "text": prompt, "cache_control": {"type": "ephemeral"}}
+        ]
+        
+        # The shared prefix is only cached once a response has started, so the
+        # first section is sent alone and the rest wait for its first event
+        # to read the prefix from cache instead of each writing it
+        prefix_cached = asyncio.Event()
+        
+        async def generate_section(title: str) -> Dict:
+            if title != SAR_SECTION_TITLES[0]:
+                await prefix_cached.wait()
+            try:
+                section = await request_section(title)
+            finally:
+                prefix_cached.set()
+            return section
+        
+        async def request_section(title: str) -> Dict:
+            async with client.messages.stream(
+                model=CLAUDE_MODEL,
+                max_tokens=1000,
+                temperature=CLAUDE_TEMPERATURE,
+                system=system,
+                tools=[EMIT_SECTION_TOOL],
+                tool_choice={"type": "tool", "name": EMIT_SECTION_TOOL["name"]},
+                messages=[{
+                    "role": "user",
+                    "content": f"Write the {title} section. {SECTION_GUIDANCE[title]}"
+                }],
+                timeout=STREAM_IDLE_TIMEOUT
+            ) as stream:
+                async for event in stream:
+                    prefix_cached.set()
+                    if event.type == "input_json" and on_text:
+                        on_text(event.partial_json)
+                message = await stream.get_final_message()
+            
+            section = _tool_input(message, EMIT_SECTION_TOOL["name"])
+            if section is None:
+                raise ValueError(f"No section returned for {title}")
+            section = dict(section, title=title)
+            if not _is_complete_section(section):
+                raise ValueError(f"Incomplete section returned for {title}")
+            return section
+        
+        tasks = [asyncio.ensure_future(generate_section(title)) for title in SAR_SECTION_TITLES]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                section = await finished
+                if on_section:
+                    on_section(section)
+        finally:
+            # Stop the remaining sections if one failed
+            for task in tasks:
+                task.cancel()
+            await client.close()
+        
+        sections = []
+        reasoning = []
+        for result in (task.result() for task in tasks):
+            reasoning.extend(result.pop("reasoning", []))
+            sections.append(result)
+        
+        return {
+            "narrative": _assemble_narrative(sections),
+            "sections": sections,
+            "reasoning": reasoning
+        }
+    
+    def _store_response(self, cache_key: str, narrative_data: Dict) -> None:
+        """Cache a Claude response, dropping expired entries so the shared cache does not grow unbounded"""
+        now = time.time()
+        for key, (stored_at, _) in list(self._response_cache.items()):
+            if now - stored_at >= RESPONSE_CACHE_TTL:
+                self._response_cache.pop(key, None)
+        self._response_cache[cache_key] = (now, narrative_data)
+    
+    def _response_cache_key(self, canonical: bytes) -> str:
+        """
+        Key for the Claude response cache, from the case's canonical bytes
+        Covers the whole case (including kyc_last_updated, so KYC refreshes
+        invalidate it) plus the prompt version
+        """
+        return hashlib.sha256(canonical + PROMPT_VERSION.encode()).hexdigest()
+    
     def _generate_template_narrative(self, case_data: Dict) -> Dict:
         """Generate SAR narrative using templates (fallback for demo)"""
         
@@ -164,7 +618,7 @@ Return your response in this JSON format:
         section1 = f"""The subject of this report is {customer['name']}, Date of Birth: {customer['date_of_birth']}, holding account number {customer['account_number']} ({customer['account_type']}) at our institution. The account was opened on {customer['account_open_date']}. The customer's occupation is listed as {customer['occupation']}, specifically operating in {customer['business_type']}. The customer's registered address is {customer['address']}. KYC records were last updated on {customer['kyc_last_updated']}, and the customer holds a current risk rating of {customer['risk_rating']}."""
         
         sections.append({
-            "title": "SUBJECT INFORMATION",
+            "title": SECTION_SUBJECT,
             "content": section1,
             "data_sources": [
                 f"Customer Name: {customer['name']}",
@@ -187,7 +641,7 @@ Notably, on {outgoing['transactions'][0]['date']} at {outgoing['transactions'][0
 This transaction pattern represents a significant deviation from the subject's established banking behavior. Historical analysis shows the customer typically conducts {context['normal_business_pattern']}, with an average monthly account balance of {customer['average_monthly_balance']}. The subject has only {context['previous_international_transfers']} previous international transfers on record."""
         
         sections.append({
-            "title": "SUSPICIOUS ACTIVITY DESCRIPTION",
+            "title": SECTION_ACTIVITY,
             "content": section2,
             "data_sources": [
                 f"Incoming: {incoming['total_count']} transactions, {incoming['total_amount']}",
@@ -203,7 +657,11 @@ This transaction pattern represents a significant deviation from the subject's e
         reasoning.append("Step 4: Mapping activity to known money laundering typologies")
         reasoning.append("Step 5: Identifying specific red flags per FinCEN guidance")
         
-        red_flags_text = "\n\n".join([f"• {flag}" for flag in context['red_flags']])
+        beneficiary_match = _COUNTRY_RE.search(outgoing['transactions'][0]['beneficiary_bank'])
+        beneficiary_country = beneficiary_match.group(1) if beneficiary_match else "an unknown jurisdiction"
+        
+        red_flags = context['red_flags']
+        red_flags_text = '• ' + '\n\n• '.join(red_flags) if red_flags else ''
         
         section3 = f"""The observed transaction pattern exhibits multiple indicators consistent with {typology['primary_typology']}, specifically the {typology['description']}. Financial Intelligence Unit (FinCEN) guidance identifies this pattern as characteristic of money laundering schemes designed to obscure the origin and destination of illicit funds.
 
@@ -213,10 +671,10 @@ The following specific red flags are present in this case:
 
 The timing and structure of these transactions suggest deliberate coordination. The rapid accumulation of funds from numerous sources within a compressed timeframe, followed by immediate consolidation and international transfer, is inconsistent with legitimate business activity in the textile trading sector. The individual transaction amounts, predominantly below standard reporting thresholds, raise concerns about potential structuring to evade regulatory detection.
 
-Furthermore, the beneficiary entity, {outgoing['transactions'][0]['beneficiary_name']}, was registered in {outgoing['transactions'][0]['beneficiary_bank'].split(',')[1].strip()} in 2023 and has limited verifiable commercial presence, which elevates concerns regarding the legitimacy of the stated business purpose."""
+Furthermore, the beneficiary entity, {outgoing['transactions'][0]['beneficiary_name']}, was registered in {beneficiary_country} in 2023 and has limited verifiable commercial presence, which elevates concerns regarding the legitimacy of the stated business purpose."""
         
         sections.append({
-            "title": "PATTERN ANALYSIS AND MONEY LAUNDERING INDICATORS",
+            "title": SECTION_PATTERN,
             "content": section3,
             "data_sources": [
                 f"Primary Typology: {typology['primary_typology']}",
@@ -241,7 +699,7 @@ However, when the subject was contacted for verification, they provided document
 The customer's explanation that all {incoming['unique_counterparties']} senders are business partners in the textile trade is not substantiated by available evidence and appears inconsistent with the scale of the customer's documented business operations."""
         
         sections.append({
-            "title": "INVESTIGATIVE FINDINGS",
+            "title": SECTION_FINDINGS,
             "content": section4,
             "data_sources": [
                 "Watchlist screening: No hits",
@@ -263,7 +721,7 @@ The activity deviates significantly from the subject's established transaction h
 This SAR is filed in accordance with 31 CFR 1020.320 and FinCEN guidance on identifying and reporting suspicious activity. The institution has taken no action to notify the subject of this filing, in compliance with 31 USC 5318(g)(2). All supporting documentation and transaction records have been preserved in accordance with recordkeeping requirements."""
         
         sections.append({
-            "title": "CONCLUSION AND BASIS FOR SUSPICION",
+            "title": SECTION_CONCLUSION,
             "content": section5,
             "data_sources": [
                 "31 CFR 1020.320 (SAR filing regulation)",
@@ -275,10 +733,7 @@ This SAR is filed in accordance with 31 CFR 1020.320 and FinCEN guidance on iden
         })
         
         # Compile full narrative
-        full_narrative = "\n\n".join([
-            f"{section['title']}\n\n{section['content']}" 
-            for section in sections
-        ])
+        full_narrative = _assemble_narrative(sections)
         
         return {
             "narrative": full_narrative,
@@ -286,62 +741,140 @@ This SAR is filed in accordance with 31 CFR 1020.320 and FinCEN guidance on iden
             "reasoning": reasoning
         }
     
-    def _build_audit_trail(self, narrative_data: Dict, case_data: Dict) -> List[Dict]:
-        """Build detailed audit trail mapping sentences to data sources"""
+    def _build_audit_trail(self, narrative_data: Dict, case_data: Dict, case_id: int) -> List[Dict]:
+        """
+        Build detailed audit trail mapping sentences to data sources
+        case_id identifies the case for the data-source cache (a hash of its
+        canonical bytes)
+        """
+        
+        # Local bindings keep attribute lookups out of the per-sentence loop
+        identify = self._identify_data_sources_cached
+        assess = self._assess_sentence_confidence
+        split = SENTENCE_SPLIT.split
         
         audit_trail = []
+        append = audit_trail.append
         
         for section in narrative_data["sections"]:
-            # Split section into sentences
-            sentences = re.split(r'(?<=[.!?])\s+', section["content"])
+            title = section["title"]
             
-            for sentence in sentences:
-                if sentence.strip():
-                    # Map sentence to data sources
-                    sources = self._identify_data_sources(sentence, case_data)
-                    
-                    audit_trail.append({
-                        "sentence": sentence.strip(),
-                        "section": section["title"],
-                        "data_sources": sources,
-                        "confidence": self._assess_sentence_confidence(sentence, case_data)
-                    })
+            # Split section into sentences
+            for sentence in split(section["content"]):
+                sentence = sentence.strip()
+                if not sentence:
+                    continue
+                
+                # Map sentence to data sources
+                sources = identify(sentence, case_data, case_id)
+                
+                append({
+                    "sentence": sentence,
+                    "section": title,
+                    "data_sources": sources,
+                    "confidence": assess(sentence, case_data, sources)
+                })
         
         return audit_trail
     
-    def _identify_data_sources(self, sentence: str, case_data: Dict) -> List[str]:
-        """Identify which data points from case_data are referenced in a sentence"""
+    def _build_source_index(self, case_data: Dict) -> Tuple[List[str], Callable[[str], set]]:
+        """
+        Build the data-source matcher for a case
         
-        sources = []
+        Returns the source labels in reporting order and a function mapping a
+        sentence to the indices of the labels it references. Uses a single-pass
+        Aho-Corasick automaton when pyahocorasick is installed, otherwise one
+        substring check per pattern.
+        """
+        
+        customer = case_data["customer"]
+        incoming = case_data["incoming_transactions"]
+        period = case_data["suspicious_activity_period"]
+        
+        labels = []
+        patterns = []
         
-        # Check for customer information
-        if case_data["customer"]["name"] in sentence:
-            sources.append(f"Customer.name = {case_data['customer']['name']}")
+        def add(label: str, *label_patterns: str):
+            for pattern in label_patterns:
+                patterns.append((pattern, len(labels)))
+            labels.append(label)
         
-        if case_data["customer"]["account_number"] in sentence:
-            sources.append(f"Customer.account_number = {case_data['customer']['account_number']}")
+        # Customer information
+        add(f"Customer.name = {customer['name']}", customer["name"])
+        add(f"Customer.account_number = {customer['account_number']}", customer["account_number"])
         
-        # Check for transaction amounts
-        amount_str = case_data["incoming_transactions"]["total_amount"]
-        if amount_str in sentence or amount_str.replace("₹", "") in sentence:
-            sources.append(f"Incoming.total_amount = {amount_str}")
+        # Transaction amount, with or without the currency symbol
+        amount_str = incoming["total_amount"]
+        add(f"Incoming.total_amount = {amount_str}", amount_str, amount_str.replace("₹", ""))
         
-        # Check for transaction count
-        count = str(case_data["incoming_transactions"]["total_count"])
-        if count in sentence:
-            sources.append(f"Incoming.transaction_count = {count}")
+        # Transaction count
+        count = str(incoming["total_count"])
+        add(f"Incoming.transaction_count = {count}", count)
         
-        # Check for dates
+        # Dates
         for date_field in ["start_date", "end_date"]:
-            date = case_data["suspicious_activity_period"][date_field]
-            if date in sentence:
-                sources.append(f"Period.{date_field} = {date}")
+            add(f"Period.{date_field} = {period[date_field]}", period[date_field])
         
-        # Check for beneficiary info
+        # Beneficiary info
         if case_data["outgoing_transactions"]["transactions"]:
             beneficiary = case_data["outgoing_transactions"]["transactions"][0]["beneficiary_name"]
-            if beneficiary in sentence:
-                sources.append(f"Outgoing.beneficiary = {beneficiary}")
+            add(f"Outgoing.beneficiary = {beneficiary}", beneficiary)
+        
+        try:
+            import ahocorasick
+        except ImportError:
+            def find_hits(sentence: str) -> set:
+                return {index for pattern, index in patterns if pattern in sentence}
+            return labels, find_hits
+        
+        # Empty patterns match every sentence, as with a substring check
+        always = {index for pattern, index in patterns if not pattern}
+        automaton = ahocorasick.Automaton()
+        for pattern, index in patterns:
+            if pattern:
+                automaton.add_word(pattern, automaton.get(pattern, ()) + (index,))
+        automaton.make_automaton()
+        
+        def find_hits(sentence: str) -> set:
+            hits = set(always)
+            for _, indices in automaton.iter(sentence):
+                hits.update(indices)
+            return hits
+        return labels, find_hits
+    
+    def _identify_data_sources_cached(self, sentence: str, case_data: Dict,
+                                      case_id: int) -> Tuple[str, ...]:
+        """
+        Memoized _identify_data_sources for repeated audit trail builds
+        Entries are keyed by (case_id, sentence) and the cache is dropped
+        whenever a different case is processed
+        """
+        
+        cache = self._sources_cache
+        if self._sources_cache_case_id != case_id:
+            cache = {}
+            self._sources_cache = cache
+            self._sources_cache_case_id = case_id
+        
+        key = (case_id, sentence)
+        sources = cache.get(key)
+        if sources is None:
+            sources = tuple(self._identify_data_sources(sentence, case_data))
+            cache[key] = sources
+        return sources
+    
+    def _identify_data_sources(self, sentence: str, case_data: Dict) -> List[str]:
+        """Identify which data points from case_data are referenced in a sentence"""
+        
+        # The matcher is built once per case and reused across its sentences
+        source_index = self._source_index
+        if source_index is None or source_index[0] is not case_data:
+            source_index = (case_data, *self._build_source_index(case_data))
+            self._source_index = source_index
+        _, labels, find_hits = source_index
+        
+        hits = find_hits(sentence)
+        sources = [label for index, label in enumerate(labels) if index in hits]
         
         # Generic source if nothing specific found
         if not sources:
@@ -349,28 +882,24 @@ This SAR is filed in accordance with 31 CFR 1020.320 and FinCEN guidance on iden
         
         return sources
     
-    def _assess_sentence_confidence(self, sentence: str, case_data: Dict) -> str:
-        """Assess confidence level for a sentence based on data availability"""
-        
-        # Keywords indicating factual statements (high confidence)
-        factual_keywords = ["account number", "date", "amount", "transaction", "received", "transferred"]
-        
-        # Keywords indicating analysis/interpretation (medium confidence)
-        analytical_keywords = ["suggests", "indicates", "appears", "consistent with", "raises concerns"]
-        
-        # Keywords indicating conclusion (varies based on evidence)
-        conclusion_keywords = ["determined", "concluded", "assessment", "based on"]
+    def _assess_sentence_confidence(self, sentence: str, case_data: Dict,
+                                    sources: Optional[Sequence[str]] = None) -> str:
+        """
+        Assess confidence level for a sentence based on data availability
+        Pass sources when they are already known to skip re-identifying them
+        """
         
-        sentence_lower = sentence.lower()
+        keyword_kinds = {match.lastgroup for match in _CONF_RE.finditer(sentence)}
         
         # Check for analytical language
-        if any(keyword in sentence_lower for keyword in analytical_keywords):
+        if "analytic" in keyword_kinds:
             return "medium"
         
         # Check for factual data points
-        if any(keyword in sentence_lower for keyword in factual_keywords):
+        if "factual" in keyword_kinds:
             # Verify data is actually present
-            sources = self._identify_data_sources(sentence, case_data)
+            if sources is None:
+                sources = self._identify_data_sources(sentence, case_data)
             if len(sources) > 1 and "Derived from" not in sources[0]:
                 return "high"
             return "medium"
@@ -392,14 +921,14 @@ This SAR is filed in accordance with 31 CFR 1020.320 and FinCEN guidance on iden
     def _generate_compliance_checklist(self, narrative_data: Dict) -> Dict[str, bool]:
         """Generate FinCEN SAR compliance checklist"""
         
-        sections_present = {section["title"] for section in narrative_data["sections"]}
+        sections_present = frozenset(section["title"] for section in narrative_data["sections"])
         
         checklist = {
-            "Subject Information Present": "SUBJECT INFORMATION" in sections_present,
-            "Activity Description Present": "SUSPICIOUS ACTIVITY DESCRIPTION" in sections_present,
-            "Suspicious Pattern Analysis": "PATTERN ANALYSIS" in sections_present or "MONEY LAUNDERING" in str(sections_present),
-            "Investigation Documented": "INVESTIGATIVE FINDINGS" in sections_present,
-            "Conclusion and Legal Basis": "CONCLUSION" in sections_present,
+            "Subject Information Present": SECTION_SUBJECT in sections_present,
+            "Activity Description Present": SECTION_ACTIVITY in sections_present,
+            "Suspicious Pattern Analysis": SECTION_PATTERN in sections_present,
+            "Investigation Documented": SECTION_FINDINGS in sections_present,
+            "Conclusion and Legal Basis": SECTION_CONCLUSION in sections_present,
             "No Discriminatory Language": True,  # Would need NLP analysis in production
             "Factual and Objective Tone": True,  # Would need NLP analysis in production
             "Specific Dates and Amounts Cited": True,  # Would verify in production
@@ -413,8 +942,9 @@ def format_currency(amount: int) -> str:
     return f"₹{amount:,}"
 
 
+@functools.lru_cache(maxsize=8)
 def calculate_time_savings(manual_hours: float = 5.5, automated_minutes: int = 50) -> Dict[str, Any]:
-    """Calculate time savings metrics"""
+    """Calculate time savings metrics (memoized; the result depends only on the arguments)"""
     
     automated_hours = automated_minutes / 60
     time_saved_hours = manual_hours - automated_hours